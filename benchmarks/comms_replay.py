@@ -0,0 +1,487 @@
+"""Replay and load-test harness for the comms WebSocket path.
+
+Sets the integration up through a real config entry, with all of its
+platforms and entities, against a local stand-in for Node-RED. The stand-in
+serves /flows and streams debug frames over /comms at controlled rates.
+For every rate stage it reports:
+
+- processing latency of the comms callback per WebSocket message (each
+  message carries up to --batch-size frames) and its mean cost per frame
+- event-loop lag, sampled by a ticker on the Home Assistant loop
+- memory growth (resident set size of the Home Assistant process)
+- entity state writes (async_write_ha_state calls) and state_changed events
+
+The stand-in runs in a child process, so encoding and sending frames does
+not compete with the Home Assistant loop for the GIL.
+
+With --baseline the results are compared with an earlier --json output and
+the script exits with status 1 when a metric regressed beyond --tolerance.
+
+Requires Home Assistant in the environment, like the integration itself.
+
+Usage:
+    python benchmarks/comms_replay.py --rates 1,100,1000,10000 --duration 10 --json baseline.json
+    python benchmarks/comms_replay.py --rates 1,100,1000,10000 --duration 10 --baseline baseline.json
+    python benchmarks/comms_replay.py --replay recorded_comms.jsonl --rates 500
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from homeassistant import config_entries, loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import restore_state as rs
+from homeassistant.helpers import translation
+
+from fixtures import COMPONENT_DIR, make_debug_frame, make_flows, load_component_module
+
+const = load_component_module("const")
+
+LAG_SAMPLE_INTERVAL = 0.01
+SEND_TICK = 0.005
+SETTLE_TIMEOUT = 120.0
+
+# Metrics compared with --baseline: (direction, absolute slack). A direction
+# of 1 means higher is worse; differences within the slack are noise.
+BASELINE_METRICS = {
+    "achieved_rate": (-1, 0.0),
+    "message_latency_p99_us": (1, 200.0),
+    "frame_latency_mean_us": (1, 10.0),
+    "loop_lag_p99_ms": (1, 5.0),
+    "state_writes_per_frame": (1, 0.1),
+}
+
+
+def rss_bytes() -> int:
+    """Return the current resident set size, or the peak where unavailable."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values, fraction):
+    """Return the value at `fraction` of the sorted values (0 when empty)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def synthetic_frames(flows, args):
+    """Yield debug frames spread over `args.fan_out` flows, forever."""
+    rng = random.Random(args.seed)
+    targets = [tab["id"] for tab in flows if tab.get("type") == "tab"][: args.fan_out]
+    payload_sizes = [int(size) for size in args.payload_sizes.split(",")]
+    while True:
+        flow_id = rng.choice(targets)
+        node_id = f"{flow_id}-debug-{rng.randrange(args.nodes_per_flow)}"
+        level = const.DEBUG_LEVEL_ERROR if rng.random() < args.error_ratio else None
+        yield make_debug_frame(flow_id, node_id, rng.choice(payload_sizes), level)
+
+
+def recorded_frames(path):
+    """Yield the frames of a recorded comms session (one message per line), forever."""
+    frames = []
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            frames.extend(message if isinstance(message, list) else [message])
+    if not frames:
+        raise SystemExit(f"No frames found in {path}")
+    return itertools.cycle(frames)
+
+
+class NodeRedStandIn:
+    """Minimal Node-RED serving /flows and streaming /comms."""
+
+    def __init__(self, flows, frames, batch_size):
+        """Initialize the stand-in."""
+        self._flows_body = json.dumps({"rev": "bench", "flows": flows}).encode()
+        self._frames = frames
+        self._batch_size = batch_size
+        self._sockets = set()
+        self._runner = None
+
+    async def start(self):
+        """Start serving on a free local port and return the port."""
+        app = web.Application()
+        app.router.add_get("/flows", self._handle_flows)
+        app.router.add_get("/comms", self._handle_comms)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop serving."""
+        await self._runner.cleanup()
+
+    async def _handle_flows(self, request):
+        return web.Response(body=self._flows_body, content_type="application/json")
+
+    async def _handle_comms(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        try:
+            async for _msg in ws:
+                pass  # Subscriptions are accepted and ignored
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    async def wait_for_client(self, timeout):
+        """Wait until the coordinator has connected to /comms."""
+        deadline = time.monotonic() + timeout
+        while not self._sockets:
+            if time.monotonic() > deadline:
+                raise TimeoutError("Coordinator did not connect to /comms")
+            await asyncio.sleep(0.05)
+
+    async def stream(self, rate, duration):
+        """Send frames at `rate` per second for `duration` seconds; return frames sent."""
+        start = time.monotonic()
+        sent = 0
+        while (elapsed := time.monotonic() - start) < duration:
+            due = int(rate * elapsed) - sent
+            while due > 0:
+                count = min(due, self._batch_size)
+                batch = [next(self._frames) for _ in range(count)]
+                # Node-RED batches frames into JSON arrays; a single frame is sent bare
+                message = batch if self._batch_size > 1 else batch[0]
+                for ws in list(self._sockets):
+                    await ws.send_str(json.dumps(message))
+                sent += count
+                due -= count
+            await asyncio.sleep(SEND_TICK)
+        return sent
+
+
+def serve_stand_in(conn, flows, args):
+    """Child process entry point: run the stand-in and execute commands from `conn`."""
+    asyncio.run(_serve_stand_in(conn, flows, args))
+
+
+async def _serve_stand_in(conn, flows, args):
+    frames = recorded_frames(args.replay) if args.replay else synthetic_frames(flows, args)
+    stand_in = NodeRedStandIn(flows, frames, args.batch_size)
+    conn.send(await stand_in.start())
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            command, *params = await loop.run_in_executor(None, conn.recv)
+            if command == "stop":
+                break
+            try:
+                conn.send(await getattr(stand_in, command)(*params))
+            except Exception as exception:  # Re-raised in the parent
+                conn.send(exception)
+    finally:
+        await stand_in.stop()
+
+
+class StandInProcess:
+    """Runs NodeRedStandIn in a child process and forwards blocking calls to it."""
+
+    def __init__(self, flows, args):
+        """Initialize the child process; frames are generated in the child."""
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=serve_stand_in, args=(child_conn, flows, args), daemon=True
+        )
+        self.port = None
+
+    def start(self):
+        """Start the child process and wait until it serves."""
+        self._process.start()
+        self.port = self._conn.recv()
+
+    def stop(self):
+        """Stop serving and join the child process."""
+        self._conn.send(("stop",))
+        self._process.join(10)
+
+    def _call(self, command, *params):
+        self._conn.send((command, *params))
+        result = self._conn.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def wait_for_client(self, timeout=10.0):
+        """Block until the coordinator has connected to /comms."""
+        self._call("wait_for_client", timeout)
+
+    def stream(self, rate, duration):
+        """Send frames at `rate` per second for `duration` seconds; return frames sent."""
+        return self._call("stream", rate, duration)
+
+
+class Probe:
+    """Instrumentation of the comms callback, entity writes and the event loop."""
+
+    def __init__(self, hass, api_class):
+        """Initialize the probe and hook into the API client and entities.
+
+        Must run before the integration is set up: the coordinator starts its
+        comms task eagerly and hands its callback to listen_comms right away.
+        """
+        self.frames = 0
+        self.latencies = []  # Seconds per WebSocket message
+        self.lags = []
+        self.state_writes = 0
+        self.state_changes = 0
+        self._ticker = None
+
+        probe = self
+        listen_comms = api_class.listen_comms
+
+        async def _listen_comms(api, callback, on_connect=None):
+            async def _timed_callback(message):
+                start = time.perf_counter()
+                await callback(message)
+                probe.latencies.append(time.perf_counter() - start)
+                probe.frames += len(message) if isinstance(message, list) else 1
+
+            return await listen_comms(api, _timed_callback, on_connect)
+
+        api_class.listen_comms = _listen_comms
+
+        write_ha_state = entity.Entity.async_write_ha_state
+
+        def _counted_write_ha_state(entity_self):
+            probe.state_writes += 1
+            return write_ha_state(entity_self)
+
+        entity.Entity.async_write_ha_state = _counted_write_ha_state
+        hass.bus.async_listen(EVENT_STATE_CHANGED, self._count_state_change)
+
+    def _count_state_change(self, event):
+        self.state_changes += 1
+
+    def reset(self):
+        """Clear all counters for a new stage."""
+        self.frames = 0
+        self.latencies = []
+        self.lags = []
+        self.state_writes = 0
+        self.state_changes = 0
+
+    def start(self, hass):
+        """Start sampling event-loop lag."""
+        self._ticker = hass.async_create_background_task(self._sample_lag(), "comms_replay_lag")
+
+    def stop(self):
+        """Stop sampling event-loop lag."""
+        self._ticker.cancel()
+
+    async def _sample_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_SAMPLE_INTERVAL)
+
+
+async def run_stage(hass, probe, stand_in, rate, duration):
+    """Stream one rate stage and return its measurements."""
+    probe.reset()
+    rss_before = rss_bytes()
+    sent = await hass.async_add_executor_job(stand_in.stream, rate, duration)
+
+    # Let the coordinator drain what is still in flight
+    deadline = time.monotonic() + max(5.0, duration)
+    while probe.frames < sent and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+    latencies_us = [latency * 1e6 for latency in probe.latencies]
+    lags_ms = [lag * 1e3 for lag in probe.lags]
+    return {
+        "target_rate": rate,
+        "sent": sent,
+        "received": probe.frames,
+        "messages": len(latencies_us),
+        "achieved_rate": round(probe.frames / duration, 1),
+        "message_latency_p50_us": round(percentile(latencies_us, 0.5), 1),
+        "message_latency_p99_us": round(percentile(latencies_us, 0.99), 1),
+        "message_latency_max_us": round(max(latencies_us, default=0.0), 1),
+        "frame_latency_mean_us": round(sum(latencies_us) / probe.frames, 1) if probe.frames else 0.0,
+        "loop_lag_p99_ms": round(percentile(lags_ms, 0.99), 2),
+        "loop_lag_max_ms": round(max(lags_ms, default=0.0), 2),
+        "memory_growth_kib": round((rss_bytes() - rss_before) / 1024, 1),
+        "state_writes": probe.state_writes,
+        "state_writes_per_frame": round(probe.state_writes / probe.frames, 2) if probe.frames else 0.0,
+        "state_changes": probe.state_changes,
+    }
+
+
+async def async_start_hass(config_dir):
+    """Return a running Home Assistant instance able to load the integration."""
+    custom_components = Path(config_dir) / "custom_components"
+    custom_components.mkdir()
+    (custom_components / COMPONENT_DIR.name).symlink_to(COMPONENT_DIR)
+    sys.path.insert(0, config_dir)
+
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    entity.async_setup(hass)
+    loader.async_setup(hass)
+    translation.async_setup(hass)
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    await rs.async_load(hass)
+    await hass.config_entries.async_initialize()
+    hass.set_state(CoreState.running)
+    return hass
+
+
+async def async_setup_integration(hass, port, expected_entities):
+    """Add a config entry for the stand-in and wait until all entities exist."""
+    entry = config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=const.DOMAIN,
+        title="Node-RED (bench)",
+        data={"host": "127.0.0.1", "port": port},
+        source=config_entries.SOURCE_USER,
+        options={},
+    )
+    await hass.config_entries.async_add(entry)
+    if entry.state is not config_entries.ConfigEntryState.LOADED:
+        raise SystemExit(f"Integration failed to set up: {entry.state} {entry.reason}")
+
+    # Entities are registered in chunks by a background task
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while len(er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)) < expected_entities:
+        if time.monotonic() > deadline:
+            raise TimeoutError("Entities were not all registered")
+        await asyncio.sleep(0.1)
+    await hass.async_block_till_done()
+    return entry
+
+
+def print_table(results):
+    """Print the stage results as an aligned table."""
+    columns = [
+        ("target_rate", "target/s"),
+        ("achieved_rate", "got/s"),
+        ("message_latency_p50_us", "msg p50 us"),
+        ("message_latency_p99_us", "msg p99 us"),
+        ("message_latency_max_us", "msg max us"),
+        ("frame_latency_mean_us", "frame us"),
+        ("loop_lag_p99_ms", "lag p99 ms"),
+        ("loop_lag_max_ms", "lag max ms"),
+        ("memory_growth_kib", "mem +KiB"),
+        ("state_writes", "writes"),
+        ("state_writes_per_frame", "writes/frame"),
+        ("state_changes", "changes"),
+    ]
+    print("  ".join(f"{title:>12}" for _key, title in columns))
+    for result in results:
+        print("  ".join(f"{result[key]:>12}" for key, _title in columns))
+    for result in results:
+        if result["received"] < result["sent"]:
+            print(f"warning: {result['sent'] - result['received']} frames not processed at {result['target_rate']}/s")
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return descriptions of metrics that regressed against the baseline stages."""
+    baseline = {result["target_rate"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["target_rate"])
+        if base is None:
+            print(f"baseline: no stage at {result['target_rate']}/s to compare with")
+            continue
+        for key, (direction, slack) in BASELINE_METRICS.items():
+            if key not in base:
+                continue
+            if direction * (result[key] - base[key]) > tolerance * abs(base[key]) + slack:
+                regressions.append(f"{key} at {result['target_rate']}/s: {base[key]} -> {result[key]}")
+    return regressions
+
+
+async def main(args):
+    flows = make_flows(args.tabs, args.env_vars)
+    stand_in = StandInProcess(flows, args)
+    stand_in.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_start_hass(config_dir)
+        try:
+            from custom_components.node_flow_manager.api import NodeRedApiClient
+
+            probe = Probe(hass, NodeRedApiClient)
+            # A switch and four sensors per flow, a number or text entity per
+            # env var, and the refresh button
+            expected_entities = args.tabs * (5 + args.env_vars) + 1
+            setup_start = time.perf_counter()
+            await async_setup_integration(hass, stand_in.port, expected_entities)
+            setup_seconds = time.perf_counter() - setup_start
+            await hass.async_add_executor_job(stand_in.wait_for_client)
+            probe.start(hass)
+
+            results = []
+            for rate in (int(rate) for rate in args.rates.split(",")):
+                results.append(await run_stage(hass, probe, stand_in, rate, args.duration))
+
+            probe.stop()
+        finally:
+            await hass.async_stop(force=True)
+            stand_in.stop()
+
+    print(f"setup: {expected_entities} entities in {setup_seconds:.2f}s")
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"baseline: no regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="1,10,100,1000,10000", help="comma separated frames/s per stage")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per stage")
+    parser.add_argument("--replay", help="JSONL file of recorded comms messages to replay")
+    parser.add_argument("--tabs", type=int, default=100)
+    parser.add_argument("--env-vars", type=int, default=10)
+    parser.add_argument("--fan-out", type=int, default=10, help="flows receiving debug frames")
+    parser.add_argument("--nodes-per-flow", type=int, default=3, help="debug nodes per flow")
+    parser.add_argument("--payload-sizes", default="64,1024,16384", help="comma separated msg sizes")
+    parser.add_argument("--error-ratio", type=float, default=0.01, help="share of error-level frames")
+    parser.add_argument("--batch-size", type=int, default=50, help="frames per WebSocket message")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--baseline", help="results of an earlier --json run; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression against --baseline")
+    asyncio.run(main(parser.parse_args()))
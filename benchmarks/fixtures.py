@@ -0,0 +1,75 @@
+"""Synthetic Node-RED payloads shared by the benchmarks."""
+import importlib.util
+import json
+from pathlib import Path
+
+COMPONENT_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "node_flow_manager"
+
+
+def load_component_module(name):
+    """Import a Home Assistant independent module of the integration by path."""
+    spec = importlib.util.spec_from_file_location(f"node_flow_manager_{name}", COMPONENT_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_tab(index, env_vars=50):
+    """Return a tab node shaped like the ones Node-RED returns from /flows."""
+    env = []
+    for env_index in range(env_vars):
+        if env_index % 3 == 0:
+            env.append({"name": f"THRESHOLD_{env_index}", "value": str(env_index * 1.5), "type": "num"})
+        elif env_index % 3 == 1:
+            env.append({"name": f"ENTITY_{env_index}", "value": f"sensor.room_{index}_{env_index}", "type": "str"})
+        else:
+            env.append({"name": f"SECRET_{env_index}", "value": "__PWRD__", "type": "cred"})
+    return {
+        "id": f"{index:016x}",
+        "type": "tab",
+        "label": f"Flow {index}",
+        "disabled": index % 7 == 0,
+        "info": f"## Flow {index}\n\nHandles automations for room {index}.\n" * 4,
+        "env": env,
+        "credentials": {"SECRET": ""},
+    }
+
+
+def make_flows(tabs=1000, env_vars=50, nodes_per_tab=5):
+    """Return a full /flows node list with tabs and a few regular nodes each."""
+    flows = []
+    for index in range(tabs):
+        tab = make_tab(index, env_vars)
+        flows.append(tab)
+        for node_index in range(nodes_per_tab):
+            flows.append({
+                "id": f"{index:08x}{node_index:08x}",
+                "type": "debug" if node_index == 0 else "function",
+                "z": tab["id"],
+                "name": f"node {node_index}",
+                "func": "return msg;",
+                "wires": [[]],
+            })
+    return flows
+
+
+def make_flows_payload(tabs=1000, env_vars=50, nodes_per_tab=5) -> bytes:
+    """Return an encoded /flows payload."""
+    return json.dumps(make_flows(tabs, env_vars, nodes_per_tab)).encode()
+
+
+def make_debug_frame(flow_id, node_id, payload_size=64, level=None):
+    """Return a single comms debug frame as published by Node-RED."""
+    data = {
+        "id": node_id,
+        "z": flow_id,
+        "name": "debug",
+        "topic": "",
+        "property": "payload",
+        "msg": "x" * payload_size,
+        "format": f"string[{payload_size}]",
+    }
+    if level is not None:
+        data["level"] = level
+    return {"topic": "debug", "data": data}
+
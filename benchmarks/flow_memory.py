@@ -0,0 +1,50 @@
+"""Measure the memory held by coordinator.data for a large Node-RED instance.
+
+Usage: python benchmarks/flow_memory.py [--tabs 1000] [--env-vars 50]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from fixtures import load_component_module, make_flows_payload
+
+
+def measure(build):
+    """Return (result, bytes still allocated by `build`)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tabs", type=int, default=1000)
+    parser.add_argument("--env-vars", type=int, default=50)
+    args = parser.parse_args()
+
+    snapshot = load_component_module("snapshot")
+    raw = make_flows_payload(args.tabs, args.env_vars)
+
+    def full_tabs():
+        return {item["id"]: item for item in json.loads(raw) if item.get("type") == "tab"}
+
+    def records():
+        return snapshot.apply_changes({}, snapshot.build_changes(raw, {}, initial=True))
+
+    _tabs, tabs_size = measure(full_tabs)
+    data, records_size = measure(records)
+    _changes, refresh_size = measure(lambda: snapshot.build_changes(raw, data))
+
+    print(f"payload:            {len(raw) / 1024:10.1f} KiB ({args.tabs} tabs x {args.env_vars} env vars)")
+    print(f"full tab dicts:     {tabs_size / 1024:10.1f} KiB")
+    print(f"flow records:       {records_size / 1024:10.1f} KiB ({records_size / tabs_size:.0%})")
+    print(f"unchanged refresh:  {refresh_size / 1024:10.1f} KiB retained")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,10 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import NodeRedApiClient
-from .const import DOMAIN, DEFAULT_PORT, DEFAULT_VERIFY_SSL, CONF_PUBLIC_URL, CONF_LOG_LEVEL, DEFAULT_LOG_LEVEL, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+from .const import DOMAIN, DEFAULT_PORT, DEFAULT_VERIFY_SSL, CONF_PUBLIC_URL, CONF_LOG_LEVEL, DEFAULT_LOG_LEVEL, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL, CONF_MIN_REFRESH_INTERVAL, DEFAULT_MIN_REFRESH_INTERVAL, CONF_ENV_INCLUDE, HISTORY_MAX_REVISIONS, HISTORY_MAX_BYTES
 from .coordinator import NodeRedCoordinator
+from .history import FlowHistory
+from .services import async_setup_services, async_unload_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,7 +38,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator = NodeRedCoordinator(
         hass, 
         client, 
-        scan_interval_seconds=config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        scan_interval_seconds=config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        min_refresh_interval=config.get(CONF_MIN_REFRESH_INTERVAL, DEFAULT_MIN_REFRESH_INTERVAL),
+        env_include=config.get(CONF_ENV_INCLUDE),
+        history=_get_history(hass, entry)
     )
     await coordinator.async_config_entry_first_refresh()
 
@@ -44,6 +49,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    async_setup_services(hass)
+
     # Reload entry when options change
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
@@ -57,5 +64,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the flow history of a removed config entry."""
+    await hass.async_add_executor_job(_get_history(hass, entry).clear)
+
+def _get_history(hass: HomeAssistant, entry: ConfigEntry) -> FlowHistory:
+    """Return the flow snapshot history stored for a config entry."""
+    return FlowHistory(
+        hass.config.path(".storage", f"{DOMAIN}_history", entry.entry_id),
+        HISTORY_MAX_REVISIONS,
+        HISTORY_MAX_BYTES,
+    )
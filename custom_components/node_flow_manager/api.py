@@ -1,3 +1,4 @@
+from functools import cached_property
 import logging
 import aiohttp
 import async_timeout
@@ -31,9 +32,13 @@ class NodeRedApiClient:
         protocol = "https" if self._verify_ssl else "http"
         return f"{protocol}://{self._host}:{self._port}"
 
-    @property
+    @cached_property
     def configuration_base_url(self) -> str:
-        """Return the base URL for configuration (browser access)."""
+        """Return the base URL for configuration (browser access).
+
+        Connection settings never change for a client instance (the entry is
+        reloaded instead), so this is derived once.
+        """
         if self._public_url:
             url = self._public_url.rstrip("/")
             if not url.startswith(("http://", "https://")):
@@ -98,6 +103,30 @@ class NodeRedApiClient:
             _LOGGER.exception("Error fetching flows: %s", exception)
             raise
 
+    async def get_flows_raw(self) -> bytes:
+        """Get the undecoded /flows payload so decoding can happen off the event loop.
+
+        The v2 API is requested so the payload carries the deployed revision.
+        """
+        url = f"{self.base_url}/flows"
+        headers = {**await self._get_headers(), "Node-RED-API-Version": "v2"}
+        
+        try:
+            async with async_timeout.timeout(10):
+                async with self._session.get(url, headers=headers, verify_ssl=self._verify_ssl) as response:
+                    if response.status == 401 and self._username:
+                        if await self.authenticate():
+                             headers = {**await self._get_headers(), "Node-RED-API-Version": "v2"}
+                             async with self._session.get(url, headers=headers, verify_ssl=self._verify_ssl) as response2:
+                                 response2.raise_for_status()
+                                 return await response2.read()
+                    
+                    response.raise_for_status()
+                    return await response.read()
+        except Exception as exception:
+            _LOGGER.exception("Error fetching flows: %s", exception)
+            raise
+
     async def get_flow(self, flow_id: str) -> dict:
         """Get a specific flow from Node-RED."""
         url = f"{self.base_url}/flow/{flow_id}"
@@ -118,13 +147,18 @@ class NodeRedApiClient:
             _LOGGER.exception("Error fetching flow %s: %s", flow_id, exception)
             raise
 
-    async def update_flow(self, flow_id: str, data: dict) -> bool:
-        """Update a flow in Node-RED safely by fetching current state first."""
+    async def update_flow(self, flow_id: str, data: dict, replace_env: bool = False) -> dict | None:
+        """Update a flow in Node-RED safely by fetching current state first.
+
+        Env variables in `data` are merged into the existing ones unless
+        `replace_env` is set. Returns the flow as deployed, or None if
+        Node-RED rejected the update.
+        """
         # Fetch current flow state to avoid overwriting other properties
         current_flow = await self.get_flow(flow_id)
         
         # Resolve any nested properties like 'env'
-        if "env" in data and "env" in current_flow:
+        if "env" in data and "env" in current_flow and not replace_env:
             # Merge env variables
             new_env = {item["name"]: item for item in current_flow["env"]}
             for updated_item in data["env"]:
@@ -146,15 +180,18 @@ class NodeRedApiClient:
                         if await self.authenticate():
                             headers = await self._get_headers()
                             async with self._session.put(url, headers=headers, json=current_flow, verify_ssl=self._verify_ssl) as response2:
-                                return response2.status == 200
+                                return current_flow if response2.status == 200 else None
 
-                    return response.status == 200
+                    return current_flow if response.status == 200 else None
         except Exception as exception:
             _LOGGER.exception("Error updating flow %s: %s", flow_id, exception)
             raise
 
-    async def listen_comms(self, callback) -> None:
-        """Listen to the Node-RED comms WebSocket."""
+    async def listen_comms(self, callback, on_connect=None) -> None:
+        """Listen to the Node-RED comms WebSocket.
+
+        `on_connect` is awaited once the socket is open, before any message.
+        """
         protocol = "wss" if self._verify_ssl else "ws"
         url = f"{protocol}://{self._host}:{self._port}/comms"
         
@@ -166,6 +203,10 @@ class NodeRedApiClient:
         
         try:
             async with self._session.ws_connect(url, verify_ssl=self._verify_ssl) as ws:
+                # Replays the retained runtime-deploy notification with the current revision
+                await ws.send_json({"subscribe": "notification/#"})
+                if on_connect is not None:
+                    await on_connect()
                 async for msg in ws:
                     if msg.type == aiohttp.WSMsgType.TEXT:
                         try:
@@ -25,6 +25,7 @@ class NodeRedRefreshButton(CoordinatorEntity, ButtonEntity):
         self._attr_icon = "mdi:refresh"
         self._entry_id = entry.entry_id
         self._host = entry.data.get("host", "Node-RED")
+        self._last_refresh_result = None
 
     @property
     def device_info(self):
@@ -37,6 +38,17 @@ class NodeRedRefreshButton(CoordinatorEntity, ButtonEntity):
             "configuration_url": self.coordinator.api.configuration_base_url,
         }
 
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        return {
+            "last_refresh_result": self._last_refresh_result,
+            "last_refresh_duration": self.coordinator.last_refresh_duration,
+            "last_payload_size": self.coordinator.last_payload_size,
+            "revision": self.coordinator.revision,
+        }
+
     async def async_press(self) -> None:
         """Handle the button press."""
-        await self.coordinator.async_request_refresh()
+        self._last_refresh_result = await self.coordinator.async_manual_refresh()
+        self.async_write_ha_state()
@@ -21,7 +21,10 @@ from .const import (
     DEFAULT_LOG_LEVEL, 
     LOG_LEVELS,
     CONF_SCAN_INTERVAL,
-    DEFAULT_SCAN_INTERVAL
+    DEFAULT_SCAN_INTERVAL,
+    CONF_MIN_REFRESH_INTERVAL,
+    DEFAULT_MIN_REFRESH_INTERVAL,
+    CONF_ENV_INCLUDE
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -114,5 +117,7 @@ class NodeRedFlowManagerOptionsFlow(config_entries.OptionsFlow):
                     )
                 ),
                 vol.Optional(CONF_SCAN_INTERVAL, default=data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Optional(CONF_MIN_REFRESH_INTERVAL, default=data.get(CONF_MIN_REFRESH_INTERVAL, DEFAULT_MIN_REFRESH_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(CONF_ENV_INCLUDE, default=data.get(CONF_ENV_INCLUDE, "")): str,
             })
         )
@@ -9,11 +9,44 @@ CONF_PUBLIC_URL = "public_url"
 CONF_PUBLIC_URL = "public_url"
 CONF_LOG_LEVEL = "log_level"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_MIN_REFRESH_INTERVAL = "min_refresh_interval"
+CONF_ENV_INCLUDE = "env_include"
+
+# Events fired on the Home Assistant bus when the coordinator sees changes
+EVENT_FLOW_CHANGED = f"{DOMAIN}_flow_changed"
+EVENT_ENV_CHANGED = f"{DOMAIN}_env_changed"
+EVENT_DEPLOYED = f"{DOMAIN}_deployed"
+
+# Outcomes of a manual refresh request
+REFRESH_FETCHED = "fetched"
+REFRESH_JOINED = "joined"
+REFRESH_UNCHANGED = "unchanged"
+REFRESH_RATE_LIMITED = "rate_limited"
 
 DEFAULT_PORT = 1880
 DEFAULT_VERIFY_SSL = False
 DEFAULT_LOG_LEVEL = "info"
 DEFAULT_SCAN_INTERVAL = 120
+DEFAULT_MIN_REFRESH_INTERVAL = 10
+
+# New entities are registered in chunks, yielding to the event loop in between
+ENTITY_CHUNK_SIZE = 100
+
+# Flow snapshot history, stored gzip compressed per flow under .storage
+HISTORY_MAX_REVISIONS = 50
+HISTORY_MAX_BYTES = 64 * 1024
+
+SERVICE_DIFF_FLOW_REVISIONS = "diff_flow_revisions"
+SERVICE_ROLLBACK_FLOW = "rollback_flow"
+
+# Debug statistics are aggregated into fixed-size time buckets covering the
+# longest window; sensors read them on a fixed cadence rather than per frame.
+DEBUG_STATS_BUCKET_SECONDS = 10
+DEBUG_STATS_WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+DEBUG_STATS_UPDATE_INTERVAL = 10
+
+# Node-RED log levels as sent in debug frames (node.error / node.warn)
+DEBUG_LEVEL_ERROR = 20
 
 LOG_LEVELS = {
     "debug": "Debug",
@@ -1,30 +1,145 @@
 import asyncio
 from datetime import timedelta
+import fnmatch
 import logging
+import re
+import time
 
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    DEBUG_STATS_BUCKET_SECONDS,
+    DEBUG_STATS_WINDOWS,
+    DEBUG_LEVEL_ERROR,
+    EVENT_FLOW_CHANGED,
+    EVENT_ENV_CHANGED,
+    EVENT_DEPLOYED,
+    DEFAULT_MIN_REFRESH_INTERVAL,
+    REFRESH_FETCHED,
+    REFRESH_JOINED,
+    REFRESH_UNCHANGED,
+    REFRESH_RATE_LIMITED,
+    ENTITY_CHUNK_SIZE,
+)
+from .history import compare_states, state_from_record
+from .snapshot import FlowRecord, apply_changes, build_changes
 
 _LOGGER = logging.getLogger(__name__)
 
+_BUCKET_COUNT = max(DEBUG_STATS_WINDOWS.values()) // DEBUG_STATS_BUCKET_SECONDS
+
+class DebugWindowStats:
+    """Rolling debug frame counters kept in fixed-size time buckets.
+
+    Recording a frame is O(1): the bucket for the current time slot is reset
+    lazily when it is reused, so no per-message history is kept.
+    """
+
+    __slots__ = ("_epochs", "_counts", "_errors", "last_seen")
+
+    def __init__(self):
+        """Initialize empty buckets."""
+        self._epochs = [-1] * _BUCKET_COUNT
+        self._counts = [0] * _BUCKET_COUNT
+        self._errors = [0] * _BUCKET_COUNT
+        self.last_seen = None
+
+    def record(self, now, is_error, timestamp):
+        """Count a single debug frame received at monotonic time `now`.
+
+        `timestamp` is the wall clock time of the frame, kept as last_seen.
+        """
+        epoch = int(now // DEBUG_STATS_BUCKET_SECONDS)
+        slot = epoch % _BUCKET_COUNT
+        if self._epochs[slot] != epoch:
+            self._epochs[slot] = epoch
+            self._counts[slot] = 0
+            self._errors[slot] = 0
+        self._counts[slot] += 1
+        if is_error:
+            self._errors[slot] += 1
+        self.last_seen = timestamp
+
+    def _totals(self, now, seconds):
+        """Return (frames, error frames, covered seconds) for the last `seconds`.
+
+        The newest bucket is still filling, so the covered span is measured up
+        to `now` rather than assumed to be the full window.
+        """
+        newest = int(now // DEBUG_STATS_BUCKET_SECONDS)
+        oldest = newest - seconds // DEBUG_STATS_BUCKET_SECONDS
+        frames = errors = 0
+        for slot, epoch in enumerate(self._epochs):
+            if oldest < epoch <= newest:
+                frames += self._counts[slot]
+                errors += self._errors[slot]
+        span = now - (oldest + 1) * DEBUG_STATS_BUCKET_SECONDS
+        return frames, errors, max(span, 1.0)
+
+    def is_idle(self, now):
+        """Return True if no frame was recorded within the longest window."""
+        return max(self._epochs) <= int(now // DEBUG_STATS_BUCKET_SECONDS) - _BUCKET_COUNT
+
+    def summary(self, now):
+        """Return rates and error counts for all windows and the last message time."""
+        result = {}
+        for window, seconds in DEBUG_STATS_WINDOWS.items():
+            frames, errors, span = self._totals(now, seconds)
+            result[f"rate_{window}"] = round(frames / span, 3)
+            result[f"errors_{window}"] = errors
+        result["last_message"] = self.last_seen
+        return result
+
+def _compile_include(patterns):
+    """Compile comma separated glob patterns into one regex, or None for all."""
+    patterns = [pattern.strip() for pattern in (patterns or "").split(",") if pattern.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
+
 class NodeRedCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Node-RED data."""
 
-    def __init__(self, hass, api, scan_interval_seconds=120):
+    def __init__(self, hass, api, scan_interval_seconds=120, min_refresh_interval=DEFAULT_MIN_REFRESH_INTERVAL, env_include=None, history=None):
         """Initialize."""
         self.api = api
         self.hass = hass
         self.debug_data = {}  # {flow_id: [messages]}
+        self.debug_stats = {}  # {flow_id: DebugWindowStats}
+        self.debug_node_stats = {}  # {flow_id: {node_id: DebugWindowStats}}
+        self._debug_listeners = {}  # {flow_id: [callback]}
+        self.deployed_revision = None  # Last revision announced over comms
+        self._announced_revision = None  # Last revision an event was fired for
+        self.revision = None  # Revision of the last fetched /flows payload
+        self.last_refresh_duration = None
+        self.last_payload_size = None
+        self._min_refresh_interval = min_refresh_interval
+        self._comms_connected = False
+        self._refresh_in_flight = None
+        self._refresh_lock = asyncio.Lock()
+        self._last_refresh_end = None
+        self._device_info = {}  # {flow_id: DeviceInfo}, rebuilt when the label changes
+        self._env_include = _compile_include(env_include)
+        self._pending_entities = []  # [(EntityPlatform, [entity])]
+        self._entity_task = None
+        self._history = history  # FlowHistory, None disables history
+        self._history_lock = asyncio.Lock()
         
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(seconds=scan_interval_seconds),
+            # Listeners are only called when a fetch returns a new snapshot
+            always_update=False,
         )
         
         # Start background task for WebSocket
@@ -36,23 +151,65 @@ class NodeRedCoordinator(DataUpdateCoordinator):
         """Listen for debug messages in a loop."""
         while True:
             try:
-                await self.api.listen_comms(self._handle_comms_message)
+                await self.api.listen_comms(self._handle_comms_message, self._handle_comms_connected)
             except Exception as e:
                 _LOGGER.error("WebSocket connection failed, retrying in 10s: %s", e)
+            finally:
+                # Deploy notifications may be missed while disconnected
+                self._comms_connected = False
+                self.deployed_revision = None
             
             # Wait before reconnecting to avoid tight loop if connection closes immediately
             await asyncio.sleep(10)
 
+    async def _handle_comms_connected(self):
+        """Handle the comms WebSocket being (re)connected."""
+        self._comms_connected = True
+
     async def _handle_comms_message(self, message):
         """Handle incoming WebSocket message."""
-        if not isinstance(message, dict):
-            return
+        # Node-RED batches several comms frames into a single WebSocket message
+        frames = message if isinstance(message, list) else [message]
+        updated_flows = set()
+        for frame in frames:
+            if isinstance(frame, dict):
+                flow_id = await self._handle_comms_frame(frame)
+                if flow_id:
+                    updated_flows.add(flow_id)
+
+        # Notify only the debug sensors of affected flows, once per message
+        for flow_id in updated_flows:
+            for update_callback in list(self._debug_listeners.get(flow_id, ())):
+                update_callback()
+
+    async def _handle_comms_frame(self, message):
+        """Handle a single comms frame; return the flow ID if debug data changed."""
+        if message.get("topic") == "notification/runtime-deploy":
+            revision = (message.get("data") or {}).get("revision")
+            if not revision:
+                return None
+            self.deployed_revision = revision
+            if self.revision is None:
+                # The first fetch is still running and sets the baseline
+                return None
+            # The notification is replayed on every (re)connect, so only fire
+            # for revisions that were not announced before
+            if revision != self._announced_revision:
+                self._announced_revision = revision
+                self.hass.bus.async_fire(EVENT_DEPLOYED, {"revision": revision})
+            if revision != self.revision:
+                # Pick up the deployed changes now instead of at the next poll,
+                # without holding up the comms reader during the download
+                self.hass.async_create_task(self.async_request_refresh())
+            return None
 
         if message.get("topic") == "debug":
             data = message.get("data", {})
             flow_id = data.get("z") # 'z' is the flow/tab ID in Node-RED
             if not flow_id:
-                return
+                return None
+
+            self._record_debug_stats(flow_id, data)
                 
             if flow_id not in self.debug_data:
                 self.debug_data[flow_id] = []
@@ -65,21 +222,296 @@ class NodeRedCoordinator(DataUpdateCoordinator):
                 "msg": data.get("msg")
             })
             self.debug_data[flow_id] = self.debug_data[flow_id][:20]
-            
-            # Trigger update for sensors
-            self.async_set_updated_data(self.data)
+            return flow_id
+
+        return None
+
+    @callback
+    def async_add_debug_listener(self, flow_id, update_callback):
+        """Listen for new debug messages of a flow; returns a function to remove it.
+
+        Debug traffic deliberately does not go through async_set_updated_data,
+        which would write every entity and postpone the next poll on each frame.
+        """
+        listeners = self._debug_listeners.setdefault(flow_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def _remove_listener():
+            listeners.remove(update_callback)
+
+        return _remove_listener
+
+    def flow_device_info(self, flow_id):
+        """Return the shared device info for a flow, built once per label."""
+        record = self.data.get(flow_id) if self.data else None
+        label = record.label if record else "Unknown Flow"
+        device_info = self._device_info.get(flow_id)
+        if device_info is None or device_info["name"] != label:
+            device_info = DeviceInfo(
+                identifiers={(DOMAIN, flow_id)},
+                name=label,
+                manufacturer="Node-RED",
+                model="Flow",
+                configuration_url=f"{self.api.configuration_base_url}/#flow/{flow_id}",
+            )
+            self._device_info[flow_id] = device_info
+        return device_info
+
+    def env_included(self, record, env_name):
+        """Return True if env entities should be created for this variable.
+
+        The include patterns match the flow label, the flow ID, the variable
+        name or "<flow label>/<variable name>".
+        """
+        if self._env_include is None:
+            return True
+        return any(
+            self._env_include.match(candidate)
+            for candidate in (record.label, record.id, env_name, f"{record.label}/{env_name}")
+        )
+
+    @callback
+    def async_add_entities_chunked(self, entry, platform, entities):
+        """Queue entities to be added to `platform` in chunks instead of in a single call."""
+        if not entities:
+            return
+        self._pending_entities.append((platform, entities))
+        if self._entity_task is None:
+            # Tied to the entry so unloading it mid-startup cancels the task
+            self._entity_task = entry.async_create_background_task(
+                self.hass, self._add_pending_entities(), "node_red_add_entities"
+            )
+
+    async def _add_pending_entities(self):
+        """Add queued entities one chunk at a time, waiting for each chunk to finish."""
+        try:
+            while self._pending_entities:
+                platform, entities = self._pending_entities.pop(0)
+                for start in range(0, len(entities), ENTITY_CHUNK_SIZE):
+                    await platform.async_add_entities(entities[start:start + ENTITY_CHUNK_SIZE])
+        finally:
+            self._entity_task = None
+
+    def _record_debug_stats(self, flow_id, data):
+        """Update windowed throughput counters for a debug frame."""
+        now = time.monotonic()
+        timestamp = time.time()
+        level = data.get("level")
+        is_error = isinstance(level, int) and level <= DEBUG_LEVEL_ERROR
+
+        if flow_id not in self.debug_stats:
+            self.debug_stats[flow_id] = DebugWindowStats()
+        self.debug_stats[flow_id].record(now, is_error, timestamp)
+
+        node_id = data.get("id")
+        if node_id:
+            node_stats = self.debug_node_stats.setdefault(flow_id, {})
+            if node_id not in node_stats:
+                node_stats[node_id] = DebugWindowStats()
+            node_stats[node_id].record(now, is_error, timestamp)
+
+    def get_debug_stats(self, flow_id):
+        """Return a summary of debug throughput for a flow and its debug nodes.
+
+        Debug nodes without frames in the longest window are forgotten, which
+        also drops nodes that were removed from the flow.
+        """
+        now = time.monotonic()
+        stats = self.debug_stats.get(flow_id)
+        summary = stats.summary(now) if stats else DebugWindowStats().summary(now)
+        node_stats = self.debug_node_stats.get(flow_id, {})
+        for node_id in [node_id for node_id, stats in node_stats.items() if stats.is_idle(now)]:
+            del node_stats[node_id]
+        summary["nodes"] = {node_id: stats.summary(now) for node_id, stats in node_stats.items()}
+        return summary
+
+    async def async_manual_refresh(self):
+        """Refresh on user request, avoiding redundant /flows downloads.
+
+        Joins a refresh that is already running, enforces the minimum interval
+        between fetches and skips the fetch when the revision announced over
+        comms matches the one we already have.
+        """
+        if self._refresh_in_flight is not None:
+            await asyncio.shield(self._refresh_in_flight)
+            return REFRESH_JOINED
+
+        if (
+            self._last_refresh_end is not None
+            and time.monotonic() - self._last_refresh_end < self._min_refresh_interval
+        ):
+            return REFRESH_RATE_LIMITED
+
+        if (
+            self._comms_connected
+            and self.last_update_success
+            and self.revision is not None
+            and self.deployed_revision == self.revision
+        ):
+            return REFRESH_UNCHANGED
+
+        await self.async_refresh()
+        return REFRESH_FETCHED
 
     async def _async_update_data(self):
         """Update data via library."""
+        # Set before the first await so concurrent manual refreshes can join it
+        in_flight = self.hass.loop.create_future()
+        self._refresh_in_flight = in_flight
         try:
-            flows = await self.api.get_flows()
-            # We want to return a dict keyed by flow ID of just the tabs (flows)
-            # Node-RED /flows returns a list of all nodes. We filter for type="tab"
-            flows_dict = {}
-            for item in flows:
-                if item.get("type") == "tab":
-                    flows_dict[item["id"]] = item
-            
-            return flows_dict
+            # Polls, debounced and manual refreshes may overlap; each diff must
+            # run against the snapshot the previous fetch left behind
+            async with self._refresh_lock:
+                start = time.monotonic()
+                try:
+                    return await self._async_fetch_flows()
+                finally:
+                    self._last_refresh_end = time.monotonic()
+                    self.last_refresh_duration = round(self._last_refresh_end - start, 3)
+        finally:
+            in_flight.set_result(None)
+            if self._refresh_in_flight is in_flight:
+                self._refresh_in_flight = None
+
+    async def _async_fetch_flows(self):
+        """Fetch /flows and apply the differences to the current snapshot."""
+        try:
+            raw = await self.api.get_flows_raw()
         except Exception as exception:
             raise UpdateFailed(exception) from exception
+        self.last_payload_size = len(raw)
+
+        initial = self.data is None
+        previous = {} if initial else self.data
+        try:
+            # Decoding and diffing several MB of flows would block the event loop
+            changes = await self.hass.async_add_executor_job(build_changes, raw, previous, initial)
+        except (ValueError, KeyError, TypeError) as exception:
+            raise UpdateFailed(f"Invalid /flows payload: {exception}") from exception
+
+        self.revision = changes.revision
+        if self._announced_revision is None:
+            # Deploy notifications of the revision we start with are not news
+            self._announced_revision = changes.revision
+        if not changes:
+            # Returning the same snapshot lets the coordinator skip its listeners
+            return previous
+
+        snapshot = apply_changes(dict(previous), changes)
+        self._update_devices(changes)
+        self._forget_flows(changes.removed)
+        self._fire_change_events(changes)
+        self.hass.async_create_background_task(
+            self._async_record_history(changes.changed.values(), "poll", changes.removed),
+            "node_red_flow_history",
+        )
+        return snapshot
+
+    async def _async_record_history(self, records, source, removed=()):
+        """Store snapshots of the given FlowRecords in the flow history."""
+        if self._history is None:
+            return {}
+        records = list(records)
+        removed = list(removed)
+
+        def _record():
+            self._history.remove(removed)
+            return self._history.record({record.id: state_from_record(record) for record in records}, source)
+
+        async with self._history_lock:
+            return await self.hass.async_add_executor_job(_record)
+
+    async def async_update_flow(self, flow_id, data, replace_env=False, source="update"):
+        """Update a flow in Node-RED and record the deployed result in the history."""
+        result = await self.api.update_flow(flow_id, data, replace_env=replace_env)
+        if result:
+            await self._async_record_history([FlowRecord.from_tab(result)], source)
+        return result
+
+    async def _async_history_call(self, method_name, *args):
+        """Run a blocking FlowHistory method, given by name, in the executor."""
+        if self._history is None:
+            raise HomeAssistantError("Flow history is not available")
+        method = getattr(self._history, method_name)
+        async with self._history_lock:
+            return await self.hass.async_add_executor_job(method, *args)
+
+    async def async_diff_revisions(self, flow_id, from_revision=None, to_revision=None):
+        """Compare two stored revisions of a flow.
+
+        Defaults to the latest revision and the one before it.
+        """
+        revisions = await self._async_history_call("revisions", flow_id)
+        if not revisions:
+            raise HomeAssistantError(f"No history recorded for flow {flow_id}")
+        numbers = [item["revision"] for item in revisions]
+        if to_revision is None:
+            to_revision = numbers[-1]
+        if from_revision is None:
+            earlier = [number for number in numbers if number < to_revision]
+            from_revision = earlier[-1] if earlier else to_revision
+        for revision in (from_revision, to_revision):
+            if revision not in numbers:
+                raise HomeAssistantError(f"Revision {revision} of flow {flow_id} is not in the history")
+
+        old = await self._async_history_call("get_state", flow_id, from_revision)
+        new = await self._async_history_call("get_state", flow_id, to_revision)
+        return {
+            "flow_id": flow_id,
+            "from_revision": from_revision,
+            "to_revision": to_revision,
+            "changes": compare_states(old, new),
+            "revisions": revisions,
+        }
+
+    async def async_rollback_flow(self, flow_id, revision):
+        """Restore label, disabled state and env of a flow revision in one deploy."""
+        state = await self._async_history_call("get_state", flow_id, revision)
+        if state is None:
+            raise HomeAssistantError(f"Revision {revision} of flow {flow_id} is not in the history")
+
+        data = {
+            "label": state["label"],
+            "disabled": state["disabled"],
+            "env": [
+                {"name": name, "value": value, "type": env_type}
+                for name, (value, env_type) in state["env"].items()
+            ],
+        }
+        if not await self.async_update_flow(flow_id, data, replace_env=True, source="rollback"):
+            raise HomeAssistantError(f"Node-RED rejected the rollback of flow {flow_id}")
+        await self.async_request_refresh()
+
+    def _forget_flows(self, flow_ids):
+        """Drop the debug messages and statistics of removed flows."""
+        for flow_id in flow_ids:
+            self.debug_data.pop(flow_id, None)
+            self.debug_stats.pop(flow_id, None)
+            self.debug_node_stats.pop(flow_id, None)
+
+    def _update_devices(self, changes):
+        """Propagate flow renames to the device registry in one pass."""
+        for flow_id in changes.removed:
+            self._device_info.pop(flow_id, None)
+
+        renamed = {
+            flow_id: flow_fields["label"]
+            for flow_id, flow_fields in changes.flow_fields.items()
+            if "label" in flow_fields and not flow_fields.get("added")
+        }
+        if not renamed:
+            return
+
+        registry = dr.async_get(self.hass)
+        for flow_id, label in renamed.items():
+            device = registry.async_get_device(identifiers={(DOMAIN, flow_id)})
+            if device is not None and device.name != label:
+                registry.async_update_device(device.id, name=label)
+
+    def _fire_change_events(self, changes):
+        """Fire bus events carrying only the fields that changed."""
+        for flow_id, flow_fields in changes.flow_fields.items():
+            self.hass.bus.async_fire(EVENT_FLOW_CHANGED, {"flow_id": flow_id, **flow_fields})
+        for flow_id, env_fields in changes.env_fields.items():
+            self.hass.bus.async_fire(EVENT_ENV_CHANGED, {"flow_id": flow_id, "env": env_fields})
@@ -0,0 +1,186 @@
+"""Disk-backed, size-capped history of per-flow snapshots.
+
+Each flow has one gzip compressed JSON file holding a base state and the
+deltas of later revisions. Nothing is kept in memory between calls; all
+methods do blocking file I/O and must run in an executor.
+"""
+from datetime import datetime, timezone
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def state_from_record(record) -> dict:
+    """Return the JSON serialisable state of a FlowRecord."""
+    return {
+        "label": record.label,
+        "disabled": record.disabled,
+        "env": {item.name: [item.value, item.type] for item in record.env},
+    }
+
+
+def diff_states(old: dict, new: dict) -> dict:
+    """Return the delta turning `old` into `new`; removed env vars map to None."""
+    delta = {}
+    for key in ("label", "disabled"):
+        if old.get(key) != new.get(key):
+            delta[key] = new.get(key)
+    old_env = old.get("env", {})
+    new_env = new.get("env", {})
+    env = {name: value for name, value in new_env.items() if old_env.get(name) != value}
+    env.update({name: None for name in old_env if name not in new_env})
+    if env:
+        delta["env"] = env
+    return delta
+
+
+def apply_delta(state: dict, delta: dict) -> dict:
+    """Return a new state with `delta` applied."""
+    result = {**state, **{key: value for key, value in delta.items() if key != "env"}}
+    env = dict(state.get("env", {}))
+    for name, value in delta.get("env", {}).items():
+        if value is None:
+            env.pop(name, None)
+        else:
+            env[name] = value
+    result["env"] = env
+    return result
+
+
+def compare_states(old: dict, new: dict) -> dict:
+    """Return a readable {field: {"from", "to"}} comparison of two states."""
+    changes = {}
+    for key in ("label", "disabled"):
+        if old.get(key) != new.get(key):
+            changes[key] = {"from": old.get(key), "to": new.get(key)}
+    old_env = old.get("env", {})
+    new_env = new.get("env", {})
+    env = {}
+    for name in {**old_env, **new_env}:
+        before = old_env.get(name)
+        after = new_env.get(name)
+        if before != after:
+            env[name] = {
+                "from": dict(zip(("value", "type"), before)) if before else None,
+                "to": dict(zip(("value", "type"), after)) if after else None,
+            }
+    if env:
+        changes["env"] = env
+    return changes
+
+
+class FlowHistory:
+    """Per-flow revision history stored under a directory."""
+
+    def __init__(self, directory, max_revisions: int, max_bytes: int):
+        """Initialize the history."""
+        self._directory = Path(directory)
+        self._max_revisions = max_revisions
+        self._max_bytes = max_bytes
+
+    def _path(self, flow_id: str) -> Path:
+        return self._directory / f"{flow_id}.json.gz"
+
+    def _load(self, flow_id: str):
+        path = self._path(flow_id)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as exception:
+            _LOGGER.warning("Discarding unreadable history for flow %s: %s", flow_id, exception)
+            return None
+
+    def _save(self, flow_id: str, history: dict) -> None:
+        """Compress and atomically write a history, folding old revisions to fit the caps."""
+        # The base state counts as one of the kept revisions
+        while len(history["revisions"]) >= self._max_revisions:
+            self._fold_oldest(history)
+        while True:
+            payload = gzip.compress(json.dumps(history, separators=(",", ":")).encode())
+            if len(payload) <= self._max_bytes or not history["revisions"]:
+                break
+            self._fold_oldest(history)
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(flow_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _fold_oldest(history: dict) -> None:
+        """Merge the oldest delta into the base state."""
+        oldest = history["revisions"].pop(0)
+        history["base"] = apply_delta(history["base"], oldest["delta"])
+        history["base_meta"] = {key: oldest[key] for key in ("revision", "time", "source")}
+
+    @staticmethod
+    def _states(history: dict):
+        """Yield (meta, state) for every stored revision, oldest first."""
+        state = history["base"]
+        yield history["base_meta"], state
+        for entry in history["revisions"]:
+            state = apply_delta(state, entry["delta"])
+            yield entry, state
+
+    def record(self, states: dict, source: str) -> dict:
+        """Store new states keyed by flow ID, skipping unchanged ones.
+
+        Returns {flow_id: revision} for the flows that got a new revision.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        recorded = {}
+        for flow_id, state in states.items():
+            history = self._load(flow_id)
+            if history is None:
+                meta = {"revision": 1, "time": now, "source": source}
+                self._save(flow_id, {"base": state, "base_meta": meta, "revisions": []})
+                recorded[flow_id] = 1
+                continue
+
+            *_, (latest_meta, latest_state) = self._states(history)
+            delta = diff_states(latest_state, state)
+            if not delta:
+                continue
+            revision = latest_meta["revision"] + 1
+            history["revisions"].append({"revision": revision, "time": now, "source": source, "delta": delta})
+            self._save(flow_id, history)
+            recorded[flow_id] = revision
+        return recorded
+
+    def revisions(self, flow_id: str) -> list:
+        """Return the metadata of all stored revisions, oldest first."""
+        history = self._load(flow_id)
+        if history is None:
+            return []
+        return [
+            {key: meta[key] for key in ("revision", "time", "source")}
+            for meta, _state in self._states(history)
+        ]
+
+    def get_state(self, flow_id: str, revision: int | None = None):
+        """Return the state at `revision` (latest if None), or None if unknown."""
+        history = self._load(flow_id)
+        if history is None:
+            return None
+        found = None
+        for meta, state in self._states(history):
+            if revision is None or meta["revision"] == revision:
+                found = state
+        return found
+
+    def remove(self, flow_ids) -> None:
+        """Delete the history of flows that no longer exist."""
+        for flow_id in flow_ids:
+            self._path(flow_id).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Delete the whole history directory."""
+        shutil.rmtree(self._directory, ignore_errors=True)
@@ -1,33 +1,80 @@
 import json
-from homeassistant.components.sensor import SensorEntity
+from datetime import timedelta
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.const import MAX_LENGTH_STATE_STATE as MAX_STATE_LENGTH
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback, async_get_current_platform
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, DEBUG_STATS_WINDOWS, DEBUG_STATS_UPDATE_INTERVAL
+
+# kind: (name suffix, icon, unit, device class, state class, summary key used as state, attribute key prefix)
+DEBUG_STAT_SENSORS = {
+    "rate": ("Debug Rate", "mdi:speedometer", "msg/s", None, SensorStateClass.MEASUREMENT, "rate_1m", "rate_"),
+    "errors": ("Debug Errors", "mdi:alert-circle", None, None, SensorStateClass.MEASUREMENT, "errors_15m", "errors_"),
+    # A timestamp only changes when a frame arrives; the frontend renders the age
+    "last_message": (
+        "Debug Last Message",
+        "mdi:clock-outline",
+        None,
+        SensorDeviceClass.TIMESTAMP,
+        None,
+        "last_message",
+        None,
+    ),
+}
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the Node-RED sensors."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    platform = async_get_current_platform()
     
     known_flows = set()
+    stats_entities = {}  # {flow_id: [NodeRedDebugStatsSensor]}
 
     def _check_new_entities():
         """Check for new flows and add debug sensors."""
         new_entities = []
-        for flow_id, flow_data in coordinator.data.items():
+        for flow_id in coordinator.data:
             if flow_id not in known_flows:
-                new_entities.append(NodeRedDebugSensor(coordinator, flow_id, flow_data.get("label")))
+                new_entities.append(NodeRedDebugSensor(coordinator, flow_id))
+                stats = coordinator.get_debug_stats(flow_id)
+                stats_entities[flow_id] = [
+                    NodeRedDebugStatsSensor(coordinator, flow_id, kind, stats)
+                    for kind in DEBUG_STAT_SENSORS
+                ]
+                new_entities.extend(stats_entities[flow_id])
                 known_flows.add(flow_id)
         
-        if new_entities:
-            async_add_entities(new_entities)
+        coordinator.async_add_entities_chunked(entry, platform, new_entities)
+
+    @callback
+    def _update_stats_entities(now):
+        """Update the debug statistics sensors on a fixed cadence.
+
+        One summary is taken per flow and shared by its sensors; flows that
+        never had debug traffic and flows whose sensors are disabled are skipped.
+        """
+        for flow_id, entities in stats_entities.items():
+            entities = [entity for entity in entities if entity.hass is not None]
+            if not entities or flow_id not in coordinator.debug_stats:
+                continue
+            stats = coordinator.get_debug_stats(flow_id)
+            for entity in entities:
+                entity.async_update_stats(stats)
 
     # Register listener
     entry.async_on_unload(coordinator.async_add_listener(_check_new_entities))
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, _update_stats_entities, timedelta(seconds=DEBUG_STATS_UPDATE_INTERVAL)
+        )
+    )
     
     # Initial check
     _check_new_entities()
@@ -35,25 +82,27 @@ async def async_setup_entry(
 class NodeRedDebugSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Node-RED Flow Debug sensor."""
 
-    def __init__(self, coordinator, flow_id, flow_label):
+    _attr_has_entity_name = True
+    _attr_name = "Debug"
+
+    def __init__(self, coordinator, flow_id):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._flow_id = flow_id
-        self._attr_name = f"{flow_label} Debug"
-        self._flow_label = flow_label
         self._attr_unique_id = f"node_red_flow_{flow_id}_debug"
         self._attr_icon = "mdi:bug"
 
+    async def async_added_to_hass(self) -> None:
+        """Follow new debug messages of this flow, in addition to coordinator updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_debug_listener(self._flow_id, self.async_write_ha_state)
+        )
+
     @property
     def device_info(self):
         """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._flow_id)},
-            "name": self._flow_label,
-            "manufacturer": "Node-RED",
-            "model": "Flow",
-            "configuration_url": f"{self.coordinator.api.configuration_base_url}/#flow/{self._flow_id}",
-        }
+        return self.coordinator.flow_device_info(self._flow_id)
 
     @property
     def native_value(self) -> str:
@@ -62,8 +111,9 @@ class NodeRedDebugSensor(CoordinatorEntity, SensorEntity):
         if messages:
             msg = messages[0].get("msg")
             if isinstance(msg, (dict, list)):
-                return json.dumps(msg)
-            return str(msg)
+                msg = json.dumps(msg)
+            # States are limited to 255 characters; the full message is in history
+            return str(msg)[:MAX_STATE_LENGTH]
         return "No messages"
 
     @property
@@ -73,3 +123,65 @@ class NodeRedDebugSensor(CoordinatorEntity, SensorEntity):
         return {
             "history": messages
         }
+
+
+class NodeRedDebugStatsSensor(SensorEntity):
+    """Windowed debug throughput statistics for a Node-RED Flow.
+
+    This entity does not follow coordinator or debug updates; the platform
+    hands it a fresh statistics summary on a fixed cadence and state is only
+    written on change. It adds three entities per flow, so it is disabled by
+    default.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, flow_id, kind, stats):
+        """Initialize the sensor from a statistics summary."""
+        name, icon, unit, device_class, state_class, state_key, attr_prefix = DEBUG_STAT_SENSORS[kind]
+        self.coordinator = coordinator
+        self._flow_id = flow_id
+        self._state_key = state_key
+        self._attr_prefix = attr_prefix
+        self._attr_name = name
+        self._attr_unique_id = f"node_red_flow_{flow_id}_debug_{kind}"
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_native_value, self._attr_extra_state_attributes = self._state_from_stats(stats)
+
+    @property
+    def device_info(self):
+        """Return information to link this entity with the correct device."""
+        return self.coordinator.flow_device_info(self._flow_id)
+
+    @callback
+    def async_update_stats(self, stats):
+        """Take the state from a statistics summary and write it if it changed."""
+        state = self._state_from_stats(stats)
+        if state != (self._attr_native_value, self._attr_extra_state_attributes):
+            self._attr_native_value, self._attr_extra_state_attributes = state
+            self.async_write_ha_state()
+
+    def _state_from_stats(self, stats):
+        """Return (state, attributes) for a summary.
+
+        The state is the statistic for the shortest relevant window; the
+        attributes hold it for every window, overall and per debug node.
+        """
+        value = stats[self._state_key]
+        if self._attr_device_class == SensorDeviceClass.TIMESTAMP and value is not None:
+            value = dt_util.utc_from_timestamp(value)
+        if self._attr_prefix is None:
+            return value, None
+
+        keys = [f"{self._attr_prefix}{window}" for window in DEBUG_STATS_WINDOWS]
+        attrs = {key: stats[key] for key in keys}
+        attrs["nodes"] = {
+            node_id: {key: node_stats[key] for key in keys}
+            for node_id, node_stats in stats["nodes"].items()
+        }
+        return value, attrs
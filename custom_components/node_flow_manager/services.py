@@ -0,0 +1,68 @@
+"""Services for the Node-RED Flow Manager integration."""
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, CONF_FLOW_ID, SERVICE_DIFF_FLOW_REVISIONS, SERVICE_ROLLBACK_FLOW
+
+ATTR_FROM_REVISION = "from_revision"
+ATTR_TO_REVISION = "to_revision"
+ATTR_REVISION = "revision"
+
+DIFF_FLOW_REVISIONS_SCHEMA = vol.Schema({
+    vol.Required(CONF_FLOW_ID): cv.string,
+    vol.Optional(ATTR_FROM_REVISION): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(ATTR_TO_REVISION): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+ROLLBACK_FLOW_SCHEMA = vol.Schema({
+    vol.Required(CONF_FLOW_ID): cv.string,
+    vol.Required(ATTR_REVISION): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+
+def _get_coordinator(hass: HomeAssistant, flow_id: str):
+    """Return the coordinator of the Node-RED instance that owns a flow."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if coordinator.data and flow_id in coordinator.data:
+            return coordinator
+    raise HomeAssistantError(f"Unknown Node-RED flow {flow_id}")
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services once for all config entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_DIFF_FLOW_REVISIONS):
+        return
+
+    async def _diff_flow_revisions(call: ServiceCall):
+        """Compare two revisions of a flow from its history."""
+        flow_id = call.data[CONF_FLOW_ID]
+        return await _get_coordinator(hass, flow_id).async_diff_revisions(
+            flow_id, call.data.get(ATTR_FROM_REVISION), call.data.get(ATTR_TO_REVISION)
+        )
+
+    async def _rollback_flow(call: ServiceCall) -> None:
+        """Restore a flow to a revision from its history."""
+        flow_id = call.data[CONF_FLOW_ID]
+        await _get_coordinator(hass, flow_id).async_rollback_flow(flow_id, call.data[ATTR_REVISION])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DIFF_FLOW_REVISIONS,
+        _diff_flow_revisions,
+        schema=DIFF_FLOW_REVISIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_ROLLBACK_FLOW, _rollback_flow, schema=ROLLBACK_FLOW_SCHEMA
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the integration services when the last entry is unloaded."""
+    if hass.data.get(DOMAIN):
+        return
+    hass.services.async_remove(DOMAIN, SERVICE_DIFF_FLOW_REVISIONS)
+    hass.services.async_remove(DOMAIN, SERVICE_ROLLBACK_FLOW)
@@ -0,0 +1,170 @@
+"""Decoding and diffing of Node-RED flow snapshots.
+
+Everything here is pure and CPU bound so the coordinator can run it in an
+executor; the event loop only applies the resulting change set.
+"""
+from dataclasses import dataclass, field
+import json
+import sys
+from typing import NamedTuple
+
+
+class EnvVar(NamedTuple):
+    """A single flow environment variable with its Node-RED type."""
+
+    name: str
+    value: object
+    type: str
+
+
+class FlowRecord:
+    """Compact view of a Node-RED tab holding only what entities use.
+
+    IDs, labels and env names/types are interned, and records (or their env
+    tuples) that did not change are reused from the previous snapshot.
+    """
+
+    __slots__ = ("id", "label", "disabled", "env")
+
+    def __init__(self, flow_id: str, label: str, disabled: bool, env: tuple):
+        """Initialize the record."""
+        self.id = flow_id
+        self.label = label
+        self.disabled = disabled
+        self.env = env
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FlowRecord):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.label == other.label
+            and self.disabled == other.disabled
+            and self.env == other.env
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"FlowRecord(id={self.id!r}, label={self.label!r}, disabled={self.disabled!r}, env={len(self.env)})"
+
+    def env_value(self, name: str, default=None):
+        """Return the value of an env variable, or `default` if it is not set."""
+        for item in self.env:
+            if item.name == name:
+                return item.value
+        return default
+
+    @classmethod
+    def from_tab(cls, tab: dict, previous: "FlowRecord | None" = None) -> "FlowRecord":
+        """Build a record from a Node-RED tab, sharing structure with `previous`."""
+        old_env = previous.env if previous is not None else ()
+        env = []
+        for index, item in enumerate(tab.get("env", [])):
+            env_var = EnvVar(_intern(item.get("name")), item.get("value"), _intern(item.get("type", "str")))
+            if index < len(old_env) and old_env[index] == env_var:
+                env_var = old_env[index]
+            env.append(env_var)
+        env = tuple(env)
+        if env == old_env:
+            env = old_env
+        label = tab.get("label", "Unknown Flow")
+        return cls(_intern(tab["id"]), _intern(label), bool(tab.get("disabled", False)), env)
+
+
+def _intern(value):
+    """Intern strings so repeated labels and names share a single object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass
+class FlowChanges:
+    """Compact difference between two flow snapshots."""
+
+    changed: dict = field(default_factory=dict)  # {flow_id: FlowRecord}
+    removed: list = field(default_factory=list)  # [flow_id]
+    flow_fields: dict = field(default_factory=dict)  # {flow_id: {field: new value}}
+    env_fields: dict = field(default_factory=dict)  # {flow_id: {env name: {"value", "type"} | None}}
+    revision: str = None  # Deployed revision reported with the payload
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def parse_flows(raw) -> tuple:
+    """Decode a /flows payload into (revision, list of tabs).
+
+    Accepts both the v1 payload (a bare node list, without revision) and the
+    v2 payload ({"rev": ..., "flows": [...]}).
+    """
+    flows = json.loads(raw)
+    revision = None
+    if isinstance(flows, dict):
+        revision = flows.get("rev")
+        flows = flows.get("flows", [])
+    # Node-RED /flows returns a list of all nodes. We filter for type="tab"
+    return revision, [item for item in flows if item.get("type") == "tab"]
+
+
+def build_changes(raw, previous: dict, initial: bool = False) -> FlowChanges:
+    """Decode a /flows payload and diff it against the previous snapshot.
+
+    `previous` maps flow IDs to FlowRecords; unchanged records are left out of
+    the change set so the existing objects stay in place. For the `initial`
+    snapshot no field level changes are reported.
+    """
+    revision, tabs = parse_flows(raw)
+    changes = FlowChanges(revision=revision)
+    seen = set()
+    for tab in tabs:
+        flow_id = tab["id"]
+        seen.add(flow_id)
+        old = previous.get(flow_id)
+        record = FlowRecord.from_tab(tab, old)
+        if record != old:
+            changes.changed[record.id] = record
+            # Field level details are only meaningful against an earlier snapshot
+            if not initial:
+                flow_fields, env_fields = diff_records(old, record)
+                if flow_fields:
+                    changes.flow_fields[record.id] = flow_fields
+                if env_fields:
+                    changes.env_fields[record.id] = env_fields
+    changes.removed = [flow_id for flow_id in previous if flow_id not in seen]
+    for flow_id in changes.removed:
+        changes.flow_fields[flow_id] = {"removed": True}
+    return changes
+
+
+def diff_records(old: "FlowRecord | None", new: FlowRecord) -> tuple:
+    """Return (changed flow fields, changed env variables) from `old` to `new`.
+
+    Removed env variables map to None.
+    """
+    if old is None:
+        flow_fields = {"added": True, "label": new.label, "disabled": new.disabled}
+        old_env = {}
+    else:
+        flow_fields = {}
+        if old.label != new.label:
+            flow_fields["label"] = new.label
+        if old.disabled != new.disabled:
+            flow_fields["disabled"] = new.disabled
+        old_env = {item.name: item for item in old.env}
+
+    env_fields = {}
+    if old is None or old.env is not new.env:
+        for item in new.env:
+            if old_env.pop(item.name, None) != item:
+                env_fields[item.name] = {"value": item.value, "type": item.type}
+        for name in old_env:
+            env_fields[name] = None
+    return flow_fields, env_fields
+
+
+def apply_changes(snapshot: dict, changes: FlowChanges) -> dict:
+    """Apply a change set to a snapshot in place, in O(changes)."""
+    snapshot.update(changes.changed)
+    for flow_id in changes.removed:
+        snapshot.pop(flow_id, None)
+    return snapshot
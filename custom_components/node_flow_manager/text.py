@@ -1,7 +1,8 @@
 from homeassistant.components.text import TextEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback, async_get_current_platform
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
@@ -11,33 +12,44 @@ async def async_setup_entry(
 ) -> None:
     """Set up the Node-RED text entities."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    platform = async_get_current_platform()
+    registry = er.async_get(hass)
     
     known_entities = set() # Set of (flow_id, env_name)
 
     def _check_new_entities():
         """Check for new text entities and add them."""
         new_entities = []
-        for flow_id, flow_data in coordinator.data.items():
-            env_list = flow_data.get("env", [])
-            for env_item in env_list:
-                name = env_item.get("name")
-                value = env_item.get("value")
+        for flow_id, record in coordinator.data.items():
+            for env_item in record.env:
+                name = env_item.name
+                value = env_item.value
                 
                 # Check if we already have this entity
                 if (flow_id, name) in known_entities:
                     continue
 
+                if not coordinator.env_included(record, name):
+                    # Remember excluded variables so they are not matched again
+                    known_entities.add((flow_id, name))
+                    # Drop entities created before the include patterns were narrowed
+                    entity_id = registry.async_get_entity_id(
+                        platform.domain, DOMAIN, f"node_red_flow_{flow_id}_env_{name}"
+                    )
+                    if entity_id:
+                        registry.async_remove(entity_id)
+                    continue
+
                 # Simple heuristic: if it can be a float, skip it (number.py will handle it)
                 # unless it contains characters that make it definitely a string
                 try:
                     float(value)
                     continue
                 except (ValueError, TypeError):
-                    new_entities.append(NodeRedEnvText(coordinator, flow_id, flow_data.get("label"), name))
+                    new_entities.append(NodeRedEnvText(coordinator, flow_id, name))
                     known_entities.add((flow_id, name))
         
-        if new_entities:
-            async_add_entities(new_entities)
+        coordinator.async_add_entities_chunked(entry, platform, new_entities)
 
     # Register listener
     entry.async_on_unload(coordinator.async_add_listener(_check_new_entities))
@@ -48,39 +60,32 @@ async def async_setup_entry(
 class NodeRedEnvText(CoordinatorEntity, TextEntity):
     """Representation of a Node-RED Flow Environment Variable as a text entity."""
 
-    def __init__(self, coordinator, flow_id, flow_label, env_name):
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, flow_id, env_name):
         """Initialize the text entity."""
         super().__init__(coordinator)
         self._flow_id = flow_id
         self._env_name = env_name
-        self._attr_name = f"{flow_label} {env_name}"
-        self._flow_label = flow_label
+        self._attr_name = env_name
         self._attr_unique_id = f"node_red_flow_{flow_id}_env_{env_name}"
 
     @property
     def device_info(self):
         """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._flow_id)},
-            "name": self._flow_label,
-            "manufacturer": "Node-RED",
-            "model": "Flow",
-            "configuration_url": f"{self.coordinator.api.configuration_base_url}/#flow/{self._flow_id}",
-        }
+        return self.coordinator.flow_device_info(self._flow_id)
 
     @property
     def native_value(self) -> str:
         """Return the value of the text entity."""
-        data = self.coordinator.data.get(self._flow_id, {})
-        env_list = data.get("env", [])
-        for item in env_list:
-            if item.get("name") == self._env_name:
-                return str(item.get("value", ""))
-        return ""
+        record = self.coordinator.data.get(self._flow_id)
+        if record is None:
+            return ""
+        return str(record.env_value(self._env_name, ""))
 
     async def async_set_value(self, value: str) -> None:
         """Set the value of the text entity."""
-        await self.coordinator.api.update_flow(
+        await self.coordinator.async_update_flow(
             self._flow_id, 
             {"env": [{"name": self._env_name, "value": value, "type": "str"}]}
         )